@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-15 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rfr_model', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='traininglock',
+            name='acquired_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
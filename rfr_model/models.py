@@ -3,3 +3,4 @@ from django.db import models
 # Create your models here.
 class TrainingLock(models.Model):
     is_locked = models.BooleanField(default=False)
+    acquired_at = models.DateTimeField(null=True, blank=True)
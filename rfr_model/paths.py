@@ -0,0 +1,32 @@
+import os
+from django.conf import settings
+
+
+def get_model_paths(price_type: str) -> dict:
+    """
+    Returns a dictionary of paths for model artifacts based on the price type.
+    """
+    if price_type not in ["local", "premium"]:
+        raise ValueError("price_type must be either 'local' or 'premium'")
+
+    model_dir = os.path.join(settings.BASE_DIR, "rfr_model", "output", price_type)
+    os.makedirs(model_dir, exist_ok=True)
+
+    return {
+        "model_dir": model_dir,
+        "model_path": os.path.join(model_dir, "rfr_model.joblib"),
+        "province_map_path": os.path.join(model_dir, "province_mapping.joblib"),
+        "eval_plot_path": os.path.join(model_dir, "evaluation_plot.png"),
+        "last_training_timestamp_path": os.path.join(
+            model_dir, "last_training_timestamp.txt"
+        ),
+        "combined_plot_path": os.path.join(model_dir, "combined_forecast_plot.png"),
+        "evaluation_metrics_path": os.path.join(model_dir, "evaluation_metrics.joblib"),
+        "df_transformed_path": os.path.join(model_dir, "df_transformed.joblib"),
+        "cached_predictions_path": os.path.join(model_dir, "cached_predictions.joblib"),
+        "eval_plot_line_path": os.path.join(model_dir, "eval_plot_line.joblib"),
+        "artifacts_meta_path": os.path.join(model_dir, "artifacts_meta.joblib"),
+        "home_summary_path": os.path.join(model_dir, "home_summary.json"),
+        "rendered_results_dir": os.path.join(model_dir, "rendered_results"),
+        "dataset_cache_dir": os.path.join(model_dir, "dataset_cache"),
+    }
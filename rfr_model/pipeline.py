@@ -1,45 +1,66 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import root_mean_squared_error, mean_absolute_percentage_error
-from hijridate import Hijri, Gregorian
 import os
-from django.conf import settings
+import joblib
 
+FEATURE_COLS = [
+    "Province_id",
+    "lag_1",
+    "month",
+    "year",
+]
+TARGET_COL = "Price"
 
-def get_model_paths(price_type: str) -> dict:
+
+def format_dates(dates: pd.Series, day_first: bool = False) -> np.ndarray:
     """
-    Returns a dictionary of paths for model artifacts based on the price type.
+    Formats a datetime Series as "YYYY-MM-DD" strings, or "DD-MM-YYYY"
+    with day_first, using NumPy instead of a per-element strftime.
     """
-    if price_type not in ["local", "premium"]:
-        raise ValueError("price_type must be either 'local' or 'premium'")
-
-    model_dir = os.path.join(settings.BASE_DIR, "rfr_model", "output", price_type)
-    os.makedirs(model_dir, exist_ok=True)
-
-    return {
-        "model_dir": model_dir,
-        "model_path": os.path.join(model_dir, "rfr_model.joblib"),
-        "province_map_path": os.path.join(model_dir, "province_mapping.joblib"),
-        "eval_plot_path": os.path.join(model_dir, "evaluation_plot.png"),
-        "last_training_timestamp_path": os.path.join(
-            model_dir, "last_training_timestamp.txt"
-        ),
-        "forecast_results_path": os.path.join(model_dir, "forecast_results.joblib"),
-        "combined_plot_path": os.path.join(model_dir, "combined_forecast_plot.png"),
-        "evaluation_metrics_path": os.path.join(model_dir, "evaluation_metrics.joblib"),
-        "df_transformed_path": os.path.join(model_dir, "df_transformed.joblib"),
-        "cached_predictions_path": os.path.join(model_dir, "cached_predictions.joblib"),
-        "eval_plot_line_path": os.path.join(model_dir, "eval_plot_line.joblib"),
-    }
+    iso = np.datetime_as_string(
+        dates.to_numpy(dtype="datetime64[D]"), unit="D"
+    ).astype("<U10")
+    if not day_first:
+        return iso
+    # Reorder the characters of each "YYYY-MM-DD" string to "DD-MM-YYYY"
+    chars = iso.view("<U1").reshape(-1, 10)[:, [8, 9, 4, 5, 6, 7, 0, 1, 2, 3]]
+    return np.ascontiguousarray(chars).view("<U10").ravel()
 
 
-def load_and_prepare_df(file_path):
+def _dataset_cache_key(file_path):
+    """
+    Identifies the version of a dataset file by its size and mtime.
+    """
+    stat = os.stat(file_path)
+    return (stat.st_size, stat.st_mtime_ns)
+
+
+def load_and_prepare_df(file_path, cache_dir=None):
     """
     Loads an Excel file and prepares it for cleaning by ensuring
-    it has a 'Province' column.
+    it has a 'Province' column. If cache_dir is given, the prepared
+    DataFrame is cached there and reused while the Excel file keeps the
+    same size and mtime.
     """
+    cache_path = None
+    if cache_dir:
+        cache_path = os.path.join(cache_dir, f"{os.path.basename(file_path)}.joblib")
+        source_key = _dataset_cache_key(file_path)
+        try:
+            cached = joblib.load(cache_path)
+        except Exception:
+            # Missing or unreadable (e.g. truncated) entries are rebuilt
+            cached = None
+        if (
+            isinstance(cached, dict)
+            and cached.get("source_key") == source_key
+            and isinstance(cached.get("df"), pd.DataFrame)
+        ):
+            return cached["df"]
+
     df = pd.read_excel(file_path)
 
     # Safely drop "No" column if it exists
@@ -50,82 +71,102 @@ def load_and_prepare_df(file_path):
     if "Province" in df.columns:
         # Drop "Semua Provinsi"
         df = df[df["Province"] != "Semua Provinsi"]
-        return df
     elif "Komoditas (Rp)" in df.columns:
         df = df.rename(columns={"Komoditas (Rp)": "Province"})
         # Drop "Semua Provinsi" data
         df = df[df["Province"] != "Semua Provinsi"]
-        return df
     else:
         raise ValueError(
             f"File '{os.path.basename(file_path)}' is missing a 'Province' or 'Komoditas (Rp)' column."
         )
 
+    if cache_path:
+        os.makedirs(cache_dir, exist_ok=True)
+        # Write to a per-process temp file and swap it in, so a worker killed
+        # mid-dump never leaves a partial entry at cache_path
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        joblib.dump({"source_key": source_key, "df": df}, tmp_path)
+        os.replace(tmp_path, cache_path)
 
-def clean_data(df_raw: pd.DataFrame) -> pd.DataFrame:
+    return df
+
+
+def prune_dataset_cache(cache_dir, file_paths):
     """
-    Cleans the raw dataset by melting, cleaning dates, cleaning prices,
-    and filling missing values.
+    Removes cached DataFrames whose dataset file is no longer among
+    file_paths, e.g. after an upload was deleted or renamed.
     """
-    # Select Date columns
-    date_cols = [c for c in df_raw.columns if c not in ["Province"]]
-
-    # Change dataset format from wide to long
-    df_long = df_raw.melt(
-        id_vars=["Province"],
-        value_vars=date_cols,
-        var_name="Date",
-        value_name="Price",
-    )
+    keep = {f"{os.path.basename(f)}.joblib" for f in file_paths}
+    try:
+        cached_files = os.listdir(cache_dir)
+    except FileNotFoundError:
+        return
+    for f in cached_files:
+        if f not in keep:
+            os.remove(os.path.join(cache_dir, f))
+
 
-    # Clean date column
-    df_long["Date"] = pd.to_datetime(
-        df_long["Date"].str.replace(" ", "").str.strip(),
+def clean_data(df_raw: pd.DataFrame) -> pd.DataFrame:
+    """
+    Cleans the raw dataset by cleaning dates, cleaning prices, filling
+    missing values and reshaping it from wide to long format.
+    """
+    # Transpose to a Date x Province grid. Each date header is then parsed
+    # once and prices are cleaned as one block, instead of melting to
+    # one row per cell first.
+    df_wide = df_raw.dropna(subset=["Province"]).set_index("Province").T
+
+    # Clean date index
+    df_wide.index = pd.to_datetime(
+        df_wide.index.str.replace(" ", "").str.strip(),
         format="%d/%m/%Y",
         errors="coerce",
     )
-
-    # Clean price column
-    df_long["Price"] = (
-        df_long["Price"]
-        .astype(str)
-        .str.strip()
-        .replace("-", np.nan)
-        .str.replace(",", "", regex=False)
+    df_wide = df_wide[df_wide.index.notna()]
+
+    # Clean prices. to_numeric already ignores surrounding whitespace and
+    # coerces placeholders like "-" to NaN, so only the thousands separator
+    # needs a string pass.
+    prices = pd.Series(df_wide.to_numpy().ravel())
+    prices = pd.to_numeric(
+        prices.astype(str).str.replace(",", "", regex=False),
+        errors="coerce",
     )
-    df_long["Price"] = pd.to_numeric(df_long["Price"], errors="coerce")
-
-    # Forward/Backward Fill Based on Each Province
-    df_long = (
-        df_long.groupby("Province", sort=False, group_keys=False)[
-            ["Date", "Price", "Province"]
-        ]
-        .apply(
-            lambda g: (
-                g.set_index("Date")
-                .reindex(
-                    pd.date_range(
-                        start=g["Date"].min(),
-                        end=g["Date"].max(),
-                        freq="D",
-                    )
-                )
-                .assign(Province=lambda x: x["Province"].ffill().bfill())
-                .assign(Price=lambda x: x["Price"].ffill().bfill())
-                .rename_axis("Date")
-                .reset_index()
-            )
-        )
-        .reset_index(drop=True)
+    df_wide = pd.DataFrame(
+        prices.to_numpy().reshape(df_wide.shape),
+        index=df_wide.index.rename("Date"),
+        columns=df_wide.columns,
     )
 
-    # Sort by date and province
-    df_long = df_long.sort_values(["Date", "Province"]).reset_index(drop=True)
+    # Forward/Backward Fill Based on Each Province, over a daily range
+    df_wide = df_wide.sort_index().sort_index(axis=1).asfreq("D").ffill().bfill()
+
+    # Change dataset format from wide to long, sorted by date and province
+    df_long = df_wide.stack().rename("Price").reset_index()
     df_long["Price"] = df_long["Price"].round().astype(int)
 
+    # Keep the column order of the original melt-based output
+    df_long = df_long[["Date", "Price", "Province"]]
+
     return df_long
 
 
+def load_and_clean_dataset(file_path, active_provinces=None, cache_dir=None):
+    """
+    Loads and cleans a single dataset file, keeping only active provinces.
+    Returns None if the file contains no active provinces.
+    """
+    raw_df = load_and_prepare_df(file_path, cache_dir=cache_dir)
+
+    # Filter dataframe to only include active provinces
+    if active_provinces is not None:
+        raw_df = raw_df[raw_df["Province"].isin(active_provinces)]
+        if raw_df.empty:
+            return None
+
+    return clean_data(raw_df)
+
+
 def merge_data(list_of_dfs: list[pd.DataFrame]) -> pd.DataFrame:
     """
     Merges a list of cleaned DataFrames into a single DataFrame.
@@ -138,8 +179,8 @@ def merge_data(list_of_dfs: list[pd.DataFrame]) -> pd.DataFrame:
 
     # Sort and drop duplicate each province and date, keeping the last entry
     df_merged = df_merged.drop_duplicates(
-        subset=["Province", "Date"], keep="last"
-    ).reset_index(drop=True)
+        subset=["Province", "Date"], keep="last", ignore_index=True
+    )
 
     return df_merged
 
@@ -147,7 +188,7 @@ def merge_data(list_of_dfs: list[pd.DataFrame]) -> pd.DataFrame:
 def transform_data(df: pd.DataFrame) -> pd.DataFrame:
     """
     Engineers features for the model, including province IDs, lag features,
-    and holiday features.
+    and time based features.
     """
 
     # Data type normalization
@@ -164,15 +205,17 @@ def transform_data(df: pd.DataFrame) -> pd.DataFrame:
     df["Province_id"] = df["Province"].map(province_mapping)
 
     # 2) Lag features
-    for lag in [1]:
-        df[f"lag_{lag}"] = df.groupby("Province", group_keys=False)["Price"].shift(lag)
+    lags = [1]
+    province_groups = df.groupby("Province", sort=False)
+    for lag in lags:
+        df[f"lag_{lag}"] = province_groups["Price"].shift(lag, fill_value=0)
 
     # 3) Time based features
     df["month"] = df["Date"].dt.month
     df["year"] = df["Date"].dt.year
 
-    # Drop rows with no lag features
-    df_transform = df.dropna(subset=["lag_1"]).reset_index(drop=True)
+    # Drop the first rows of each province, which have no lag features
+    df_transform = df[province_groups.cumcount() >= max(lags)].reset_index(drop=True)
 
     return df_transform, province_mapping
 
@@ -189,16 +232,9 @@ def train_model(df_mining: pd.DataFrame):
         max_features="sqrt",
         bootstrap=True,
         random_state=42,
-        n_jobs=1,
+        n_jobs=-1,
     )
     train_size = 0.9
-    FEATURE_COLS = [
-        "Province_id",
-        "lag_1",
-        "month",
-        "year",
-    ]
-    TARGET_COL = "Price"
 
     # Specify X for features and y for target
     X = df_mining.drop(columns=[TARGET_COL])
@@ -209,11 +245,13 @@ def train_model(df_mining: pd.DataFrame):
     X_train, X_test = X.iloc[:split_index], X.iloc[split_index:]
     y_train, y_test = y.iloc[:split_index], y.iloc[split_index:]
 
+    # sklearn trees split on float32, so hand over float32 arrays up front
+    # instead of letting fit/predict convert int64/float64 frames each call
     model = RandomForestRegressor(**RFR_PARAMS)
-    model.fit(X_train[FEATURE_COLS], y_train)
+    model.fit(X_train[FEATURE_COLS].to_numpy(dtype=np.float32), y_train)
 
     # Predict on the test set
-    y_pred = model.predict(X_test[FEATURE_COLS])
+    y_pred = model.predict(X_test[FEATURE_COLS].to_numpy(dtype=np.float32))
 
     # Overall Evaluation Metrics
     overall_rmse = root_mean_squared_error(y_test, y_pred)
@@ -240,25 +278,25 @@ def train_model(df_mining: pd.DataFrame):
         "by_province": per_province_metrics,
     }
 
-    # Create scatter plot for visualization
-    plt.figure(figsize=(5, 5))
-    plt.scatter(y_test, y_pred, alpha=0.6)
+    # Create scatter plot for visualization. A standalone Figure is not
+    # tracked by pyplot, so it is freed once the caller drops it instead of
+    # piling up in a long-running worker.
+    fig = Figure(figsize=(5, 5))
+    ax = fig.subplots()
+    ax.scatter(y_test, y_pred, alpha=0.6)
     max_val = max(y_test.max(), y_pred.max())
     min_val = min(y_test.min(), y_pred.min())
-    plt.plot([min_val, max_val], [min_val, max_val], "r--", linewidth=2)
-    plt.xlabel("Actual")
-    plt.ylabel("Prediction")
-    plt.tight_layout()
-
-    # The plot is returned to be handled by the view (e.g., save to buffer)
-    plot = plt
+    ax.plot([min_val, max_val], [min_val, max_val], "r--", linewidth=2)
+    ax.set_xlabel("Actual")
+    ax.set_ylabel("Prediction")
+    fig.tight_layout()
 
     # Generate line plot data
     line_plot_data = plot_actual_vs_prediction_line(
         df_eval, title="Actual vs. Predicted Trend"
     )
 
-    return model, evaluation_metrics, plot, df_eval, line_plot_data
+    return model, evaluation_metrics, fig, df_eval, line_plot_data
 
 
 def plot_actual_vs_prediction_line(df_eval, title="Actual vs. Predicted Trend"):
@@ -272,7 +310,7 @@ def plot_actual_vs_prediction_line(df_eval, title="Actual vs. Predicted Trend"):
         # Actual data trace
         traces.append(
             {
-                "x": group["Date"].dt.strftime("%Y-%m-%d").tolist(),
+                "x": format_dates(group["Date"]).tolist(),
                 "y": group["Actual"].tolist(),
                 "mode": "lines",
                 "name": f"{province} - Actual",
@@ -284,7 +322,7 @@ def plot_actual_vs_prediction_line(df_eval, title="Actual vs. Predicted Trend"):
         # Predicted data trace
         traces.append(
             {
-                "x": group["Date"].dt.strftime("%Y-%m-%d").tolist(),
+                "x": format_dates(group["Date"]).tolist(),
                 "y": group["Predicted"].tolist(),
                 "mode": "lines",
                 "name": f"{province} - Predicted",
@@ -297,7 +335,7 @@ def plot_actual_vs_prediction_line(df_eval, title="Actual vs. Predicted Trend"):
     df_mean = df_eval.groupby("Date").mean(numeric_only=True).reset_index()
     traces.append(
         {
-            "x": df_mean["Date"].dt.strftime("%Y-%m-%d").tolist(),
+            "x": format_dates(df_mean["Date"]).tolist(),
             "y": df_mean["Actual"].tolist(),
             "mode": "lines",
             "name": "Mean - Actual",
@@ -307,7 +345,7 @@ def plot_actual_vs_prediction_line(df_eval, title="Actual vs. Predicted Trend"):
     )
     traces.append(
         {
-            "x": df_mean["Date"].dt.strftime("%Y-%m-%d").tolist(),
+            "x": format_dates(df_mean["Date"]).tolist(),
             "y": df_mean["Predicted"].tolist(),
             "mode": "lines",
             "name": "Mean - Predicted",
@@ -327,6 +365,17 @@ def plot_actual_vs_prediction_line(df_eval, title="Actual vs. Predicted Trend"):
     return {"data": traces, "layout": layout}
 
 
+def refit_on_full_data(df_transform: pd.DataFrame, model: RandomForestRegressor):
+    """
+    Re-fits the model on the full dataset, including the most recent rows
+    held out for evaluation, so forecasts start from the latest data.
+    """
+    X_full = df_transform[FEATURE_COLS].to_numpy(dtype=np.float32)
+    y_full = df_transform[TARGET_COL]
+    model.fit(X_full, y_full)
+    return model
+
+
 def forecast_future_data(
     df_transform: pd.DataFrame,
     province_mapping: dict,
@@ -335,9 +384,11 @@ def forecast_future_data(
 ):
     """
     Forecasts future sugar prices for a given horizon using a trained model.
+    The model is used as-is; call refit_on_full_data first to include the
+    evaluation rows.
     """
 
-    forecast_results = []
+    horizon = 180
 
     # Filter provinces if selected_province is provided
     if selected_province:
@@ -345,68 +396,45 @@ def forecast_future_data(
     else:
         provinces = df_transform["Province"].unique()
 
-    # The notebook trains a new model here. We will use the one passed as a parameter.
-    # Re-fitting the model on the full dataset before forecasting
-    FEATURE_COLS = [
-        "Province_id",
-        "lag_1",
-        "month",
-        "year",
-    ]
-    TARGET_COL = "Price"
-    X_full = df_transform[FEATURE_COLS]
-    y_full = df_transform[TARGET_COL]
-    model.fit(X_full, y_full)
-
-    for prov in provinces:
-        g = df_transform[df_transform["Province"] == prov].copy()
-        g = g.sort_values("Date").reset_index(drop=True)
-
-        last_date = g["Date"].max()
-        last_rows = g.tail(30).copy()
-
-        prov_id = province_mapping[prov]
-
-        for i in range(1, 180 + 1):
-            next_date = last_date + pd.Timedelta(days=i)
-
-            month = next_date.month
-            year = next_date.year
-
-            lag_1 = last_rows.iloc[-1]["Price"]
-
-            X_future = pd.DataFrame(
-                {
-                    "Province_id": [prov_id],
-                    "lag_1": [lag_1],
-                    "month": [month],
-                    "year": [year],
-                }
-            )
-
-            predicted_price = model.predict(X_future)[0]
-
-            forecast_results.append(
-                {
-                    "Date": next_date,
-                    "Province": prov,
-                    "Prediction": round(predicted_price),
-                }
-            )
-
-            new_row = pd.DataFrame(
-                [
-                    {
-                        "Date": next_date,
-                        "Price": predicted_price,
-                        "Province": prov,
-                        "Province_id": prov_id,
-                    }
-                ]
-            )
-            last_rows = pd.concat([last_rows, new_row], ignore_index=True)
-
-    df_forecast = pd.DataFrame(forecast_results)
+    # Last known row of each province, in the same order as `provinces`
+    last_rows = (
+        df_transform.sort_values("Date")
+        .groupby("Province")
+        .tail(1)
+        .set_index("Province")
+        .loc[provinces]
+    )
+    provinces = np.asarray(provinces, dtype=object)
+    prov_ids = np.array([province_mapping[prov] for prov in provinces])
+    lag_1 = last_rows["Price"].to_numpy(dtype=np.float64)
+
+    # Future dates for every (day, province) pair, shape (horizon, n_provinces)
+    days_ahead = np.arange(1, horizon + 1).astype("timedelta64[D]")
+    future_dates = last_rows["Date"].to_numpy()[None, :] + days_ahead[:, None]
+    future_index = pd.DatetimeIndex(future_dates.ravel())
+    months = future_index.month.to_numpy().reshape(future_dates.shape)
+    years = future_index.year.to_numpy().reshape(future_dates.shape)
+
+    # Predict all provinces at once for each day, feeding the predictions
+    # back in as the next day's lag. X_future is allocated once and its
+    # per-day columns are overwritten in place.
+    predictions = np.empty(future_dates.shape, dtype=np.float64)
+    X_future = np.empty((len(provinces), len(FEATURE_COLS)), dtype=np.float32)
+    X_future[:, 0] = prov_ids
+    for i in range(horizon):
+        X_future[:, 1] = lag_1
+        X_future[:, 2] = months[i]
+        X_future[:, 3] = years[i]
+        lag_1 = model.predict(X_future)
+        predictions[i] = lag_1
+
+    df_forecast = pd.DataFrame(
+        {
+            "Date": future_index,
+            "Province": np.tile(provinces, horizon),
+            "Prediction": np.rint(predictions.ravel()).astype(int),
+        }
+    )
     df_forecast = df_forecast.sort_values(["Province", "Date"]).reset_index(drop=True)
     return df_forecast
 
@@ -422,20 +450,23 @@ def plot_combined_forecast(
     """
     traces = []
 
-    # Sort historical data to ensure chronological plotting
+    # Sort historical data to ensure chronological plotting, and format
+    # the dates once for every trace
     df_historical = df_historical.sort_values("Date")
+    df_historical = df_historical.assign(
+        DateStr=format_dates(df_historical["Date"])
+    )
 
     # Historical data trace
     if (
         "Province" in df_historical.columns
-        and len(df_historical["Province"].unique()) > 1
+        and df_historical["Province"].nunique() > 1
     ):
         # Plotting individual provinces
-        for province in df_historical["Province"].unique():
-            hist_data = df_historical[df_historical["Province"] == province]
+        for province, hist_data in df_historical.groupby("Province", sort=False):
             traces.append(
                 {
-                    "x": hist_data["Date"].dt.strftime("%Y-%m-%d").tolist(),
+                    "x": hist_data["DateStr"].tolist(),
                     "y": hist_data["Price"].tolist(),
                     "mode": "lines",
                     "name": f"{province} Historical",
@@ -446,7 +477,7 @@ def plot_combined_forecast(
         # Plotting mean or a single province
         traces.append(
             {
-                "x": df_historical["Date"].dt.strftime("%Y-%m-%d").tolist(),
+                "x": df_historical["DateStr"].tolist(),
                 "y": df_historical["Price"].tolist(),
                 "mode": "lines",
                 "name": "Historical",
@@ -456,18 +487,20 @@ def plot_combined_forecast(
 
     # Sort predicted data to ensure chronological plotting
     df_predicted = df_predicted.sort_values("Date")
+    df_predicted = df_predicted.assign(
+        DateStr=format_dates(df_predicted["Date"])
+    )
 
     # Predicted data trace
     if (
         "Province" in df_predicted.columns
-        and len(df_predicted["Province"].unique()) > 1
+        and df_predicted["Province"].nunique() > 1
     ):
         # Plotting individual provinces
-        for province in df_predicted["Province"].unique():
-            pred_data = df_predicted[df_predicted["Province"] == province]
+        for province, pred_data in df_predicted.groupby("Province", sort=False):
             traces.append(
                 {
-                    "x": pred_data["Date"].dt.strftime("%Y-%m-%d").tolist(),
+                    "x": pred_data["DateStr"].tolist(),
                     "y": pred_data["Prediction"].tolist(),
                     "mode": "lines",
                     "name": f"{province} Forecast",
@@ -478,7 +511,7 @@ def plot_combined_forecast(
         # Plotting mean or a single province
         traces.append(
             {
-                "x": df_predicted["Date"].dt.strftime("%Y-%m-%d").tolist(),
+                "x": df_predicted["DateStr"].tolist(),
                 "y": df_predicted["Prediction"].tolist(),
                 "mode": "lines",
                 "name": "Forecast",
@@ -494,3 +527,55 @@ def plot_combined_forecast(
     }
 
     return {"data": traces, "layout": layout}
+
+
+def render_province_results(
+    cached_predictions: dict, price_type: str, last_date: pd.Timestamp
+) -> dict:
+    """
+    Prepares the response pieces the result views serve for every
+    province, so requests only have to look them up. Returns a dict of
+    province -> {"forecast_rows", "combined_plot_data", "prediction_start_date"}.
+    """
+    rendered = {}
+    for province, province_data in cached_predictions.items():
+        df_historical = province_data["historical"]
+        df_predicted = province_data["predicted"]
+
+        # Forecast table as {"columns", "data"}, built in one constructor
+        # and rounded to whole rupiah. The mean view labels prices "Price".
+        table_columns = {"Date": format_dates(df_predicted["Date"], day_first=True)}
+        if "Province" in df_predicted.columns:
+            table_columns["Province"] = df_predicted["Province"].to_numpy()
+        price_col = "Price" if province == "All" else "Prediction"
+        table_columns[price_col] = np.rint(
+            df_predicted["Prediction"].to_numpy()
+        ).astype(np.int32)
+        df_for_table = pd.DataFrame(table_columns)
+
+        if province == "All":
+            plot_title = f"Forecasted Sugar Prices (Mean, {price_type.capitalize()})"
+        else:
+            plot_title = (
+                f"Forecasted Sugar Prices ({province}, {price_type.capitalize()})"
+            )
+
+        # Limit historical data for plotting to six months before the
+        # forecast. Both frames are sorted by date, so the cut point can be
+        # found with a binary search.
+        prediction_start_date = last_date + pd.Timedelta(days=1)
+        if not df_predicted.empty:
+            prediction_start_date = df_predicted["Date"].iat[0]
+            six_months_before = prediction_start_date - pd.DateOffset(months=6)
+            start = df_historical["Date"].searchsorted(six_months_before)
+            df_historical = df_historical.iloc[start:]
+
+        rendered[province] = {
+            "forecast_rows": df_for_table.to_dict(orient="split", index=False),
+            "combined_plot_data": plot_combined_forecast(
+                df_historical, df_predicted, title=plot_title
+            ),
+            "prediction_start_date": prediction_start_date.strftime("%Y-%m-%d"),
+        }
+
+    return rendered
@@ -1,19 +1,103 @@
 import os
 import re
+import json
+import shutil
+import tempfile
 import pandas as pd
 import joblib
+from concurrent.futures import ProcessPoolExecutor
 from django.conf import settings
 from django.utils import timezone
 from .models import TrainingLock
 from .pipeline import (
-    clean_data,
     transform_data,
     train_model,
     merge_data,
     load_and_prepare_df,
+    load_and_clean_dataset,
+    prune_dataset_cache,
+    refit_on_full_data,
     forecast_future_data,
-    get_model_paths,
+    render_province_results,
 )
+from .paths import get_model_paths
+
+
+DUMP_KWARGS = {"compress": ("zlib", 3), "protocol": 5}
+
+
+def save_result_artifacts(paths, price_type, df_transformed, cached_predictions):
+    """
+    Renders the per-province results the views serve and saves them as
+    one shard per province, followed by the artifacts_meta that points
+    at them. Used at the end of training, and by the views to upgrade
+    models trained before these artifacts existed.
+    """
+    provinces = sorted(p for p in cached_predictions if p != "All")
+    first_date = df_transformed["Date"].min()
+    last_date = df_transformed["Date"].max()
+    rendered_results = render_province_results(
+        cached_predictions, price_type, last_date
+    )
+
+    # One shard per province, so a request only loads the one it shows.
+    # Each call writes its shards to a new directory, so views still
+    # holding the previous metadata keep reading a consistent set.
+    rendered_root = paths["rendered_results_dir"]
+    rendered_version = timezone.now().strftime("%Y%m%d%H%M%S%f")
+    rendered_dir = os.path.join(rendered_root, rendered_version)
+    os.makedirs(rendered_dir)
+    rendered_files = {}
+    for i, province in enumerate(["All"] + provinces):
+        rendered_files[province] = f"{i:03d}.joblib"
+        joblib.dump(
+            rendered_results[province],
+            os.path.join(rendered_dir, rendered_files[province]),
+            **DUMP_KWARGS,
+        )
+
+    # Values the result views would otherwise derive from df_transformed.
+    # Written last and swapped in atomically: it is what points the
+    # views at the new shard directory.
+    artifacts_meta = {
+        "provinces": provinces,
+        "province_set": frozenset(provinces),
+        "first_date": first_date,
+        "last_date": last_date,
+        "rendered_version": rendered_version,
+        "rendered_files": rendered_files,
+    }
+    tmp_meta_path = f"{paths['artifacts_meta_path']}.{os.getpid()}.tmp"
+    joblib.dump(artifacts_meta, tmp_meta_path, **DUMP_KWARGS)
+    os.replace(tmp_meta_path, paths["artifacts_meta_path"])
+
+    # Only now drop the shard directories of earlier (or failed) runs
+    for name in os.listdir(rendered_root):
+        if name == rendered_version:
+            continue
+        old_path = os.path.join(rendered_root, name)
+        if os.path.isdir(old_path):
+            shutil.rmtree(old_path, ignore_errors=True)
+        else:
+            os.remove(old_path)
+
+
+def save_home_summary(paths, df_transformed, evaluation):
+    """
+    Saves the few values the home page shows as plain JSON, so it does
+    not need to unpickle anything. Written to a temp file and swapped in,
+    so readers never see a partial file.
+    """
+    home_summary = {
+        "first_date": df_transformed["Date"].min().strftime("%d-%m-%Y"),
+        "last_date": df_transformed["Date"].max().strftime("%d-%m-%Y"),
+        "RMSE": float(evaluation["overall"]["RMSE"]),
+        "MAPE": float(evaluation["overall"]["MAPE"]),
+    }
+    fd, tmp_path = tempfile.mkstemp(dir=paths["model_dir"], suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(home_summary, f)
+    os.replace(tmp_path, paths["home_summary_path"])
 
 
 def train_on_all_datasets_task(price_type: str):
@@ -36,6 +120,9 @@ def train_on_all_datasets_task(price_type: str):
             print(f"No datasets found in {upload_dir} to train on.")
             return
 
+        # Drop cached parses of datasets that have since been removed
+        prune_dataset_cache(paths["dataset_cache_dir"], all_files)
+
         # Identify active provinces from the latest dataset
         file_with_years = []
         for f in all_files:
@@ -48,7 +135,9 @@ def train_on_all_datasets_task(price_type: str):
             file_with_years.sort(key=lambda x: x[0], reverse=True)
             latest_file_path = file_with_years[0][1]
             print(f"Latest dataset identified: {os.path.basename(latest_file_path)}")
-            latest_raw_df = load_and_prepare_df(latest_file_path)
+            latest_raw_df = load_and_prepare_df(
+                latest_file_path, cache_dir=paths["dataset_cache_dir"]
+            )
             active_provinces = latest_raw_df["Province"].unique()
             print(
                 f"Found {len(active_provinces)} active provinces in the latest dataset."
@@ -61,25 +150,36 @@ def train_on_all_datasets_task(price_type: str):
 
         list_of_cleaned_dfs = []
         print(f"Found {len(all_files)} datasets. Cleaning...")
-        for file_path in all_files:
-            try:
-                raw_df = load_and_prepare_df(file_path)
-
-                # Filter dataframe to only include active provinces
-                if active_provinces is not None:
-                    raw_df = raw_df[raw_df["Province"].isin(active_provinces)]
-                    if raw_df.empty:
-                        print(
-                            f"--> Skipping file {os.path.basename(file_path)} as it contains no active provinces."
-                        )
-                        continue
-
-                cleaned_df = clean_data(raw_df)
+        # Files are independent, so load and clean them in parallel. Results
+        # are collected in submission order so merge_data keeps the same
+        # "last entry wins" behaviour.
+        max_workers = min(len(all_files), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(
+                    load_and_clean_dataset,
+                    file_path,
+                    active_provinces,
+                    paths["dataset_cache_dir"],
+                ): file_path
+                for file_path in all_files
+            }
+            for future, file_path in futures.items():
+                try:
+                    cleaned_df = future.result()
+                except Exception as e:
+                    print(
+                        f"--> Skipping file {os.path.basename(file_path)} due to error: {e}"
+                    )
+                    continue
+
+                if cleaned_df is None:
+                    print(
+                        f"--> Skipping file {os.path.basename(file_path)} as it contains no active provinces."
+                    )
+                    continue
+
                 list_of_cleaned_dfs.append(cleaned_df)
-            except Exception as e:
-                print(
-                    f"--> Skipping file {os.path.basename(file_path)} due to error: {e}"
-                )
 
         if not list_of_cleaned_dfs:
             print("No valid datasets could be processed. Aborting training.")
@@ -88,7 +188,7 @@ def train_on_all_datasets_task(price_type: str):
         # Merge all cleaned datasets
         print("Merging datasets...")
         merged_df = merge_data(list_of_cleaned_dfs)
-        merged_df = merged_df.sort_values(by="Date").reset_index(drop=True)
+        merged_df = merged_df.sort_values(by="Date", ignore_index=True)
 
         # Transform data (feature engineering)
         print("Running feature engineering...")
@@ -96,7 +196,11 @@ def train_on_all_datasets_task(price_type: str):
 
         # Train Model
         print("Training the model...")
-        model, evaluation, plot, df_eval, line_plot_data = train_model(df_transformed)
+        model, evaluation, fig, df_eval, line_plot_data = train_model(df_transformed)
+
+        # Re-fit on the full dataset before forecasting
+        print("Re-fitting the model on the full dataset...")
+        model = refit_on_full_data(df_transformed, model)
 
         # Generate and save forecast results
         print("Generating forecast...")
@@ -107,13 +211,13 @@ def train_on_all_datasets_task(price_type: str):
         all_provinces = sorted(df_transformed["Province"].unique().tolist())
         cached_predictions = {}
 
-        # Individual provinces
+        # Individual provinces, split with one groupby pass per frame
+        hist_groups = dict(tuple(df_transformed.groupby("Province", sort=False)))
+        pred_groups = dict(tuple(forecast_df.groupby("Province", sort=False)))
         for province in all_provinces:
-            df_hist = df_transformed[df_transformed["Province"] == province].copy()
-            df_pred = forecast_df[forecast_df["Province"] == province].copy()
             cached_predictions[province] = {
-                "historical": df_hist,
-                "predicted": df_pred,
+                "historical": hist_groups[province],
+                "predicted": pred_groups[province],
             }
 
         # Mean of all provinces
@@ -125,16 +229,24 @@ def train_on_all_datasets_task(price_type: str):
         }
 
         # Save artifacts
+        # The full forecast is not saved separately; cached_predictions
+        # already holds every forecast row
         print("Saving model and artifacts...")
-        joblib.dump(model, paths["model_path"])
-        joblib.dump(province_mapping, paths["province_map_path"])
-        joblib.dump(forecast_df, paths["forecast_results_path"])
-        joblib.dump(evaluation, paths["evaluation_metrics_path"])
-        joblib.dump(df_transformed, paths["df_transformed_path"])
-        joblib.dump(cached_predictions, paths["cached_predictions_path"])
-        joblib.dump(line_plot_data, paths["eval_plot_line_path"])
-        plot.savefig(paths["eval_plot_path"])
-        plot.close()
+        joblib.dump(model, paths["model_path"], **DUMP_KWARGS)
+        joblib.dump(province_mapping, paths["province_map_path"], **DUMP_KWARGS)
+        joblib.dump(evaluation, paths["evaluation_metrics_path"], **DUMP_KWARGS)
+        joblib.dump(df_transformed, paths["df_transformed_path"], **DUMP_KWARGS)
+        joblib.dump(
+            cached_predictions, paths["cached_predictions_path"], **DUMP_KWARGS
+        )
+        joblib.dump(line_plot_data, paths["eval_plot_line_path"], **DUMP_KWARGS)
+
+        save_home_summary(paths, df_transformed, evaluation)
+        fig.savefig(paths["eval_plot_path"])
+
+        # Pre-rendered results and the metadata that points the views at them
+        print("Rendering per-province results...")
+        save_result_artifacts(paths, price_type, df_transformed, cached_predictions)
 
         # Save the timestamp
         with open(paths["last_training_timestamp_path"], "w") as f:
@@ -147,7 +259,5 @@ def train_on_all_datasets_task(price_type: str):
         raise
     finally:
         # Always release the lock
-        lock = TrainingLock.objects.get(pk=1)
-        lock.is_locked = False
-        lock.save()
+        TrainingLock.objects.filter(pk=1).update(is_locked=False, acquired_at=None)
 
@@ -1,3 +1,263 @@
-from django.test import TestCase
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+import joblib
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from sklearn.ensemble import RandomForestRegressor
+
+from .models import TrainingLock
+from .paths import get_model_paths
+from .pipeline import FEATURE_COLS, TARGET_COL, clean_data, forecast_future_data, transform_data
+from .q_tasks import save_result_artifacts
+from .views import TRAINING_LOCK_TTL
+
+
+def make_raw_dataset(start="2023-01-01", days=60, provinces=3, seed=0):
+    """
+    Builds a raw dataset in the uploaded Excel layout: one row per
+    province and one "dd/ mm/ YYYY" column per weekday, with some
+    missing ("-") prices.
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(start, periods=days, freq="D")
+    dates = dates[dates.dayofweek < 5]
+    columns = [d.strftime("%d/ %m/ %Y") for d in dates]
+    rows = []
+    for p in range(provinces):
+        prices = [
+            f"{int(14000 + p * 500 + rng.integers(-300, 300)):,}"
+            if rng.random() > 0.1
+            else "-"
+            for _ in columns
+        ]
+        rows.append([f"Prov{p}"] + prices)
+    return pd.DataFrame(rows, columns=["Province"] + columns)
+
+
+def clean_data_reference(df_raw):
+    """
+    The original melt-based clean_data, kept to check the grid-based
+    rewrite against.
+    """
+    date_cols = [c for c in df_raw.columns if c not in ["Province"]]
+    df_long = df_raw.melt(
+        id_vars=["Province"], value_vars=date_cols, var_name="Date", value_name="Price"
+    )
+    df_long["Date"] = pd.to_datetime(
+        df_long["Date"].str.replace(" ", "").str.strip(),
+        format="%d/%m/%Y",
+        errors="coerce",
+    )
+    df_long["Price"] = (
+        df_long["Price"]
+        .astype(str)
+        .str.strip()
+        .replace("-", np.nan)
+        .str.replace(",", "", regex=False)
+    )
+    df_long["Price"] = pd.to_numeric(df_long["Price"], errors="coerce")
+    df_long = (
+        df_long.groupby("Province", sort=False, group_keys=False)[
+            ["Date", "Price", "Province"]
+        ]
+        .apply(
+            lambda g: (
+                g.set_index("Date")
+                .reindex(pd.date_range(g["Date"].min(), g["Date"].max(), freq="D"))
+                .assign(Province=lambda x: x["Province"].ffill().bfill())
+                .assign(Price=lambda x: x["Price"].ffill().bfill())
+                .rename_axis("Date")
+                .reset_index()
+            )
+        )
+        .reset_index(drop=True)
+    )
+    df_long = df_long.sort_values(["Date", "Province"]).reset_index(drop=True)
+    df_long["Price"] = df_long["Price"].round().astype(int)
+    return df_long
+
+
+def forecast_reference(df_transform, province_mapping, model, horizon=180):
+    """
+    The original one-province, one-day-at-a-time forecast loop, without
+    its built-in refit.
+    """
+    results = []
+    for prov in df_transform["Province"].unique():
+        g = df_transform[df_transform["Province"] == prov].sort_values("Date")
+        last_date = g["Date"].max()
+        lag_1 = g.iloc[-1]["Price"]
+        for i in range(1, horizon + 1):
+            next_date = last_date + pd.Timedelta(days=i)
+            X_future = pd.DataFrame(
+                {
+                    "Province_id": [province_mapping[prov]],
+                    "lag_1": [lag_1],
+                    "month": [next_date.month],
+                    "year": [next_date.year],
+                }
+            )
+            lag_1 = model.predict(X_future.to_numpy())[0]
+            results.append(
+                {"Date": next_date, "Province": prov, "Prediction": round(lag_1)}
+            )
+    df_forecast = pd.DataFrame(results)
+    return df_forecast.sort_values(["Province", "Date"]).reset_index(drop=True)
+
+
+class CleanDataTests(SimpleTestCase):
+    def test_matches_melt_based_implementation(self):
+        df_raw = make_raw_dataset(days=90, provinces=4)
+
+        expected = clean_data_reference(df_raw.copy())
+        result = clean_data(df_raw.copy())
+
+        self.assertEqual(list(result.columns), ["Date", "Price", "Province"])
+        pd.testing.assert_frame_equal(
+            result.reset_index(drop=True), expected, check_dtype=False
+        )
+
+
+class ForecastFutureDataTests(SimpleTestCase):
+    def test_matches_per_province_loop(self):
+        df_transformed, province_mapping = transform_data(
+            clean_data(make_raw_dataset(days=90, provinces=2))
+        )
+        model = RandomForestRegressor(n_estimators=5, random_state=0)
+        model.fit(
+            df_transformed[FEATURE_COLS].to_numpy(), df_transformed[TARGET_COL].to_numpy()
+        )
+
+        expected = forecast_reference(df_transformed, province_mapping, model)
+        result = forecast_future_data(df_transformed, province_mapping, model)
+
+        pd.testing.assert_frame_equal(
+            result[["Date", "Province", "Prediction"]], expected, check_dtype=False
+        )
+
+
+@mock.patch("rfr_model.views.async_task")
+class TrainingLockClaimTests(TestCase):
+    def post_training(self):
+        return self.client.post(
+            "/train/", json.dumps({"price_type": "local"}), content_type="application/json"
+        )
+
+    def test_first_request_creates_the_lock(self, async_task):
+        response = self.post_training()
+
+        self.assertEqual(response.status_code, 202)
+        lock = TrainingLock.objects.get(pk=1)
+        self.assertTrue(lock.is_locked)
+        self.assertIsNotNone(lock.acquired_at)
+        async_task.assert_called_once()
+
+    def test_free_lock_is_claimed(self, async_task):
+        TrainingLock.objects.create(pk=1, is_locked=False)
+
+        self.assertEqual(self.post_training().status_code, 202)
+        self.assertTrue(TrainingLock.objects.get(pk=1).is_locked)
+
+    def test_held_lock_is_rejected(self, async_task):
+        TrainingLock.objects.create(pk=1, is_locked=True, acquired_at=timezone.now())
+
+        self.assertEqual(self.post_training().status_code, 409)
+        async_task.assert_not_called()
+
+    def test_stale_lock_is_taken_over(self, async_task):
+        acquired_at = timezone.now() - TRAINING_LOCK_TTL - timedelta(seconds=1)
+        TrainingLock.objects.create(pk=1, is_locked=True, acquired_at=acquired_at)
+
+        self.assertEqual(self.post_training().status_code, 202)
+        self.assertGreater(TrainingLock.objects.get(pk=1).acquired_at, acquired_at)
+
+    def test_held_lock_without_acquired_at_is_taken_over(self, async_task):
+        TrainingLock.objects.create(pk=1, is_locked=True, acquired_at=None)
+
+        self.assertEqual(self.post_training().status_code, 202)
+        self.assertIsNotNone(TrainingLock.objects.get(pk=1).acquired_at)
+
+    def test_lock_is_released_when_enqueueing_fails(self, async_task):
+        async_task.side_effect = RuntimeError("broker down")
+
+        self.assertEqual(self.post_training().status_code, 500)
+        self.assertFalse(TrainingLock.objects.get(pk=1).is_locked)
+
+
+class PredictionViewCachingTests(SimpleTestCase):
+    def setUp(self):
+        self.base_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.base_dir, ignore_errors=True)
+        settings_override = override_settings(BASE_DIR=self.base_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.paths = get_model_paths("local")
+        df_transformed, province_mapping = transform_data(
+            clean_data(make_raw_dataset(days=40, provinces=2))
+        )
+        forecast_df = df_transformed.groupby("Province").tail(3).rename(
+            columns={"Price": "Prediction"}
+        )
+        cached_predictions = {
+            province: {
+                "historical": df_transformed[df_transformed["Province"] == province],
+                "predicted": forecast_df[forecast_df["Province"] == province],
+            }
+            for province in province_mapping
+        }
+        cached_predictions["All"] = {
+            "historical": df_transformed.groupby("Date")["Price"].mean().reset_index(),
+            "predicted": forecast_df.groupby("Date")["Prediction"].mean().reset_index(),
+        }
+        joblib.dump({"overall": {"RMSE": 1.0, "MAPE": 2.0}}, self.paths["evaluation_metrics_path"])
+        joblib.dump({}, self.paths["eval_plot_line_path"])
+        with open(self.paths["eval_plot_path"], "wb") as f:
+            f.write(b"\x89PNG")
+        save_result_artifacts(self.paths, "local", df_transformed, cached_predictions)
+
+    def test_results_answer_304_for_matching_etag(self):
+        for url in ["/results/?price_type=local&province=Prov1", "/prediction_table/"]:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn("public", response["Cache-Control"])
+                self.assertIn("max-age=60", response["Cache-Control"])
+
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+                self.assertEqual(response.status_code, 304)
+                self.assertIn("public", response["Cache-Control"])
+
+    def test_etag_changes_after_retraining(self):
+        url = "/prediction_table/?province=Prov0"
+        etag = self.client.get(url)["ETag"]
+
+        meta_path = self.paths["artifacts_meta_path"]
+        mtime_ns = os.stat(meta_path).st_mtime_ns + 10**9
+        os.utime(meta_path, ns=(mtime_ns, mtime_ns))
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_evaluation_plot_answers_304(self):
+        response = self.client.get("/evaluation_plot/?price_type=local")
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get(
+            "/evaluation_plot/?price_type=local", HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_missing_model_is_not_cached(self):
+        response = self.client.get("/results/?price_type=premium")
+
+        self.assertEqual(response.status_code, 404)
+        self.assertNotIn("public", response.get("Cache-Control", ""))
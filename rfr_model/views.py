@@ -1,21 +1,171 @@
-from django.http import JsonResponse
-from django.views.decorators.http import require_POST
+from django.http import FileResponse, Http404, JsonResponse
+from django.views.decorators.http import condition, require_POST
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.gzip import gzip_page
 from django_q.tasks import async_task
-from django_q.models import Task
 from django.conf import settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from datetime import timedelta
+from functools import wraps
 import os
 import json
-import pandas as pd
+import hashlib
 import joblib
-import io
-import base64
-from django.db import transaction
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.db.models import Q
 from .models import TrainingLock
-from .pipeline import (
-    get_model_paths,
-    plot_combined_forecast,
-)
+from .paths import get_model_paths
+
+TRAINING_TIMEOUT = 300  # seconds
+
+# A lock held longer than this is assumed to belong to a worker that died
+# without releasing it. The margin covers time spent waiting in the queue.
+TRAINING_LOCK_TTL = timedelta(seconds=2 * TRAINING_TIMEOUT)
+
+# How long browsers and shared caches may reuse prediction responses
+# before revalidating them with their ETag
+PREDICTION_CACHE_MAX_AGE = 60  # seconds
+
+# The evaluation plot URL carries the file's mtime, so each URL is immutable
+EVALUATION_PLOT_MAX_AGE = 24 * 60 * 60  # seconds
+
+# Artifacts loaded by the result views, keyed by path as (mtime_ns, object).
+# Retraining rewrites the files, so a changed mtime triggers a reload. The
+# lock keeps concurrent requests from loading the same artifact twice.
+_artifact_cache = {}
+_artifact_cache_lock = threading.Lock()
+
+# Serializes the one-off upgrade of models trained before artifacts_meta
+# and the rendered shards existed
+_legacy_upgrade_lock = threading.Lock()
+
+
+def _load_cached_many(paths):
+    """
+    Returns the joblib artifacts at the given paths, reusing loaded
+    objects until the files on disk change. Artifacts that need
+    (re)loading are read concurrently. Callers must not mutate them.
+    """
+    mtimes = {path: os.stat(path).st_mtime_ns for path in paths}
+    with _artifact_cache_lock:
+        stale = [
+            path
+            for path in paths
+            if _artifact_cache.get(path, (None,))[0] != mtimes[path]
+        ]
+        if stale:
+            with ThreadPoolExecutor(max_workers=len(stale)) as executor:
+                for path, obj in zip(stale, executor.map(joblib.load, stale)):
+                    _artifact_cache[path] = (mtimes[path], obj)
+        return [_artifact_cache[path][1] for path in paths]
+
+
+def _ensure_result_artifacts(paths, price_type):
+    """
+    Models trained before artifacts_meta existed only have df_transformed
+    and cached_predictions. Builds the metadata and rendered shards from
+    those on first access, so such a model keeps being served without a
+    retrain. Does nothing when the metadata exists or the model is not
+    trained at all.
+    """
+    try:
+        os.stat(paths["artifacts_meta_path"])
+        return
+    except FileNotFoundError:
+        pass
+
+    with _legacy_upgrade_lock:
+        if os.path.exists(paths["artifacts_meta_path"]):
+            return
+        try:
+            df_transformed = joblib.load(paths["df_transformed_path"])
+            cached_predictions = joblib.load(paths["cached_predictions_path"])
+        except FileNotFoundError:
+            return
+
+        # Imported here so web processes only load the pipeline if needed
+        from .q_tasks import save_result_artifacts
+
+        save_result_artifacts(paths, price_type, df_transformed, cached_predictions)
+
+
+def _cache_publicly(max_age):
+    """
+    Decorator that lets browsers and shared caches keep successful and
+    not-modified responses for max_age seconds. Error responses such as
+    a missing model are left uncached.
+    """
+
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            response = view_func(request, *args, **kwargs)
+            if response.status_code in (200, 304):
+                patch_cache_control(response, public=True, max_age=max_age)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def _missing_artifact_response(path, price_type):
+    """
+    Returns a 404 response naming the missing artifact at path.
+    """
+    return JsonResponse(
+        {
+            "error": f"Artifact {os.path.basename(path)} not found for '{price_type}' model. Please train it first."
+        },
+        status=404,
+    )
+
+
+def _artifact_etag(*path_keys):
+    """
+    Returns an etag function for condition() that hashes the price_type,
+    province and the mtimes of the given artifacts. Returns None when an
+    artifact is missing so the view can report it.
+    """
+
+    def etag_func(request):
+        price_type = request.GET.get("price_type") or "local"
+        if price_type not in ["local", "premium"]:
+            return None
+        paths = get_model_paths(price_type)
+        try:
+            mtimes = [os.stat(paths[key]).st_mtime_ns for key in path_keys]
+        except FileNotFoundError:
+            return None
+        province = request.GET.get("province") or "All"
+        return hashlib.md5(f"{price_type}:{province}:{mtimes}".encode()).hexdigest()
+
+    return etag_func
+
+
+def _rendered_results_path(paths, artifacts_meta, province):
+    """
+    Returns the path of the pre-rendered results shard for a province.
+    Cached shards from earlier training runs are evicted, since each run
+    writes its shards to a new directory.
+    """
+    version_dir = os.path.join(
+        paths["rendered_results_dir"], artifacts_meta["rendered_version"]
+    )
+    rendered_root = paths["rendered_results_dir"] + os.sep
+    with _artifact_cache_lock:
+        stale = [
+            path
+            for path in _artifact_cache
+            if path.startswith(rendered_root)
+            and not path.startswith(version_dir + os.sep)
+        ]
+        for path in stale:
+            del _artifact_cache[path]
+    return os.path.join(version_dir, artifacts_meta["rendered_files"][province])
 
 
 @csrf_exempt
@@ -35,10 +185,22 @@ def start_training_view(request):
                 status=400,
             )
 
-        with transaction.atomic():
-            lock, created = TrainingLock.objects.select_for_update().get_or_create(pk=1)
-
-            if lock.is_locked:
+        # Claim the lock in a single UPDATE if it is free or stale. A lock
+        # held without acquired_at predates that column and is treated as
+        # stale, since nothing can tell how old it is.
+        now = timezone.now()
+        claimed = TrainingLock.objects.filter(
+            Q(is_locked=False)
+            | Q(acquired_at__isnull=True)
+            | Q(acquired_at__lt=now - TRAINING_LOCK_TTL),
+            pk=1,
+        ).update(is_locked=True, acquired_at=now)
+        if not claimed:
+            # The lock row is created on the first training request
+            _, created = TrainingLock.objects.get_or_create(
+                pk=1, defaults={"is_locked": True, "acquired_at": now}
+            )
+            if not created:
                 return JsonResponse(
                     {
                         "error": "A training task is already in progress. Please wait for it to complete."
@@ -46,26 +208,16 @@ def start_training_view(request):
                     status=409,
                 )
 
-            task_name = "rfr_model.q_tasks.train_on_all_datasets_task"
-            in_progress_tasks = Task.objects.filter(
-                func=task_name, success__isnull=True
-            ).count()
-            if in_progress_tasks > 0:
-                return JsonResponse(
-                    {
-                        "error": "A training task is already in progress (according to Django Q). Please wait."
-                    },
-                    status=409,
-                )
-
-            lock.is_locked = True
-            lock.save()
+        try:
             async_task(
-                task_name,
+                "rfr_model.q_tasks.train_on_all_datasets_task",
                 price_type,
                 hook="rfr_model.hooks.training_complete_hook",
-                timeout=300,
+                timeout=TRAINING_TIMEOUT,
             )
+        except Exception:
+            TrainingLock.objects.filter(pk=1).update(is_locked=False, acquired_at=None)
+            raise
 
         return JsonResponse(
             {"message": f"Model training for '{price_type}' started in the background."},
@@ -80,11 +232,20 @@ def start_training_view(request):
 
 
 
+@gzip_page
+@_cache_publicly(PREDICTION_CACHE_MAX_AGE)
+@condition(
+    etag_func=_artifact_etag(
+        "eval_plot_path",
+        "evaluation_metrics_path",
+        "eval_plot_line_path",
+        "artifacts_meta_path",
+    )
+)
 def prediction_results_view(request):
     """
     Loads the pre-computed forecast and evaluation data for a given
-    price_type and returns them. Can also generate forecast based on
-    a selected province.
+    price_type and returns them for the selected province.
     """
     selected_province = request.GET.get("province") or "All"
     price_type = request.GET.get("price_type") or "local"
@@ -96,37 +257,30 @@ def prediction_results_view(request):
 
     try:
         paths = get_model_paths(price_type)
-        required_files = [
-            paths["eval_plot_path"],
-            paths["evaluation_metrics_path"],
-            paths["df_transformed_path"],
-            paths["cached_predictions_path"],
-            paths["eval_plot_line_path"],
-        ]
-
-        for f in required_files:
-            if not os.path.exists(f):
-                return JsonResponse(
-                    {
-                        "error": f"Artifact {os.path.basename(f)} not found for '{price_type}' model. Please train it first."
-                    },
-                    status=404,
-                )
-
-        # Load necessary artifacts
-        evaluation_metrics = joblib.load(paths["evaluation_metrics_path"])
-        df_transformed = joblib.load(paths["df_transformed_path"])
-        cached_predictions = joblib.load(paths["cached_predictions_path"])
-        eval_plot_line_data = joblib.load(paths["eval_plot_line_path"])
-
-        # Determine prediction start date
-        prediction_start_date = df_transformed["Date"].max() + pd.Timedelta(days=1)
+        _ensure_result_artifacts(paths, price_type)
+
+        # A missing artifact surfaces as FileNotFoundError from the stat
+        # calls, so no separate existence checks are needed
+        try:
+            eval_plot_mtime_ns = os.stat(paths["eval_plot_path"]).st_mtime_ns
+            evaluation_metrics, eval_plot_line_data, artifacts_meta = _load_cached_many(
+                [
+                    paths["evaluation_metrics_path"],
+                    paths["eval_plot_line_path"],
+                    paths["artifacts_meta_path"],
+                ]
+            )
+        except FileNotFoundError as e:
+            return _missing_artifact_response(e.filename, price_type)
 
         # Get list of all provinces for the dropdown
-        all_provinces_list = ["All"] + sorted(df_transformed["Province"].unique().tolist())
+        all_provinces_list = ["All"] + artifacts_meta["provinces"]
 
         # Validate selected_province
-        if selected_province not in all_provinces_list:
+        if (
+            selected_province != "All"
+            and selected_province not in artifacts_meta["province_set"]
+        ):
             return JsonResponse(
                 {"error": f"Province '{selected_province}' not found."}, status=400
             )
@@ -141,75 +295,32 @@ def prediction_results_view(request):
         )
 
 
-        # Get data from cache
-        province_data = cached_predictions[selected_province]
-        df_historical_for_plot = province_data["historical"]
-        df_predicted_for_plot = province_data["predicted"]
-
-        df_for_table = df_predicted_for_plot.copy()
-        df_for_table["Prediction"] = df_for_table["Prediction"].round(0)
-
-        if selected_province == "All":
-            plot_title = f"Forecasted Sugar Prices (Mean, {price_type.capitalize()})"
-        else:
-            plot_title = (
-                f"Forecasted Sugar Prices ({selected_province}, {price_type.capitalize()})"
-            )
-
-        # Format 'Date' column for table
-        if selected_province == "All":
-            df_for_table = df_for_table.rename(columns={"Prediction": "Price"})
-
-        # Convert the price column to int to remove .0 decimals
-        if "Price" in df_for_table.columns:
-            df_for_table["Price"] = df_for_table["Price"].astype(int)
-        elif "Prediction" in df_for_table.columns:
-            df_for_table["Prediction"] = df_for_table["Prediction"].astype(int)
-
-        df_for_table["Date"] = df_for_table["Date"].dt.strftime("%d-%m-%Y")
-
-        # Prepare forecast table HTML
-        forecast_table_html = df_for_table.to_html(
-            classes="min-w-full divide-y divide-gray-200", border=0, index=False
-        )
-        forecast_table_html = forecast_table_html.replace(
-            "<th>",
-            '<th class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">',
-        )
-        forecast_table_html = forecast_table_html.replace(
-            "<td>", '<td class="px-6 py-4 whitespace-nowrap text-left">'
+        # Link to the evaluation plot instead of inlining it. The mtime
+        # changes on retraining, so browsers can cache each version.
+        plot_url = "{}?price_type={}&v={}".format(
+            reverse("evaluation_plot"),
+            price_type,
+            eval_plot_mtime_ns,
         )
 
-        # Encode evaluation plot to base64
-        with open(paths["eval_plot_path"], "rb") as image_file:
-            encoded_string = base64.b64encode(image_file.read()).decode()
-        plot_base64 = f"data:image/png;base64,{encoded_string}"
-
-        # Limit historical data for plotting
-        if not df_predicted_for_plot.empty:
-            prediction_start_date = df_predicted_for_plot["Date"].min()
-            six_months_before = prediction_start_date - pd.DateOffset(months=6)
-            df_historical_for_plot = df_historical_for_plot[
-                df_historical_for_plot["Date"] >= six_months_before
-            ].copy()
-
-        # Generate Plotly data dynamically
-        plotly_combined_plot_data = plot_combined_forecast(
-            df_historical_for_plot, df_predicted_for_plot, title=plot_title
-        )
+        # The plot spec was rendered at training time
+        shard_path = _rendered_results_path(paths, artifacts_meta, selected_province)
+        try:
+            (province_results,) = _load_cached_many([shard_path])
+        except FileNotFoundError:
+            return _missing_artifact_response(shard_path, price_type)
 
         return JsonResponse(
             {
-                "forecast_table": forecast_table_html,
-                "plot": plot_base64,
+                "plot": plot_url,
                 "evaluation_metrics": evaluation_metrics,
-                "combined_plot_data": plotly_combined_plot_data,
+                "combined_plot_data": province_results["combined_plot_data"],
                 "eval_plot_line_data": eval_plot_line_data,
                 "provinces": all_provinces_list,
                 "selected_province": selected_province,
                 "prev_province": prev_province,
                 "next_province": next_province,
-                "prediction_start_date": prediction_start_date.strftime("%Y-%m-%d"),
+                "prediction_start_date": province_results["prediction_start_date"],
                 "price_type": price_type,
                 "debug_metrics_path": paths["evaluation_metrics_path"], # For debugging
             }
@@ -219,10 +330,13 @@ def prediction_results_view(request):
             {"error": f"Failed to generate results: {str(e)}"}, status=500
         )
 
+@gzip_page
+@_cache_publicly(PREDICTION_CACHE_MAX_AGE)
+@condition(etag_func=_artifact_etag("artifacts_meta_path"))
 def prediction_table_view(request):
     """
-    Generates and returns only the prediction table HTML based on
-    the selected province and price_type.
+    Returns only the prediction table rows based on the selected
+    province and price_type.
     """
     selected_province = request.GET.get("province") or "All"
     price_type = request.GET.get("price_type") or "local"
@@ -234,64 +348,54 @@ def prediction_table_view(request):
 
     try:
         paths = get_model_paths(price_type)
-        required_files = [
-            paths["cached_predictions_path"],
-            paths["df_transformed_path"],
-        ]
+        _ensure_result_artifacts(paths, price_type)
 
-        for f in required_files:
-            if not os.path.exists(f):
-                return JsonResponse(
-                    {
-                        "error": f"Artifact {os.path.basename(f)} not found for '{price_type}' model. Please train it first."
-                    },
-                    status=404,
-                )
-
-        # Load necessary artifacts
-        cached_predictions = joblib.load(paths["cached_predictions_path"])
-        df_transformed = joblib.load(paths["df_transformed_path"])
+        try:
+            (artifacts_meta,) = _load_cached_many([paths["artifacts_meta_path"]])
+        except FileNotFoundError:
+            return _missing_artifact_response(paths["artifacts_meta_path"], price_type)
 
-        # Get list of all provinces for validation
-        all_provinces = sorted(df_transformed["Province"].unique().tolist())
-        if selected_province not in all_provinces and selected_province != "All":
+        # Validate selected_province
+        if (
+            selected_province != "All"
+            and selected_province not in artifacts_meta["province_set"]
+        ):
             return JsonResponse(
                 {"error": f"Province '{selected_province}' not found."}, status=400
             )
 
-        # Get data from cache
-        province_data = cached_predictions[selected_province]
-        df_for_table = province_data["predicted"].copy()
+        shard_path = _rendered_results_path(paths, artifacts_meta, selected_province)
+        try:
+            (province_results,) = _load_cached_many([shard_path])
+        except FileNotFoundError:
+            return _missing_artifact_response(shard_path, price_type)
 
-        # Round and format for display
-        df_for_table["Prediction"] = df_for_table["Prediction"].round(0)
-        df_for_table["Date"] = df_for_table["Date"].dt.strftime("%d-%m-%Y")
+        # The table is rendered in the browser from columns and rows
+        return JsonResponse({"forecast_rows": province_results["forecast_rows"]})
 
-        # Rename 'Prediction' to 'Price' for mean view
-        if selected_province == "All":
-            df_for_table = df_for_table.rename(columns={"Prediction": "Price"})
-
-        # Convert numeric columns to int
-        if "Price" in df_for_table.columns:
-            df_for_table["Price"] = df_for_table["Price"].astype(int)
-        if "Prediction" in df_for_table.columns:
-            df_for_table["Prediction"] = df_for_table["Prediction"].astype(int)
-
-        # Prepare forecast table HTML
-        forecast_table_html = df_for_table.to_html(
-            classes="min-w-full divide-y divide-gray-200", border=0, index=False
-        )
-        forecast_table_html = forecast_table_html.replace(
-            "<th>",
-            '<th class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">',
-        )
-        forecast_table_html = forecast_table_html.replace(
-            "<td>", '<td class="px-6 py-4 whitespace-nowrap text-left">'
+    except Exception as e:
+        return JsonResponse(
+            {"error": f"Failed to generate prediction table: {str(e)}"}, status=500
         )
 
-        return JsonResponse({"forecast_table": forecast_table_html})
 
-    except Exception as e:
+@_cache_publicly(EVALUATION_PLOT_MAX_AGE)
+@condition(etag_func=_artifact_etag("eval_plot_path"))
+def evaluation_plot_view(request):
+    """
+    Serves the evaluation scatter plot PNG for the given price_type.
+    """
+    price_type = request.GET.get("price_type") or "local"
+
+    if price_type not in ["local", "premium"]:
         return JsonResponse(
-            {"error": f"Failed to generate prediction table: {str(e)}"}, status=500
+            {"error": "Invalid 'price_type'. Must be 'local' or 'premium'."}, status=400
+        )
+
+    paths = get_model_paths(price_type)
+    try:
+        return FileResponse(
+            open(paths["eval_plot_path"], "rb"), content_type="image/png"
         )
+    except FileNotFoundError:
+        raise Http404("Evaluation plot not found. Please train the model first.")
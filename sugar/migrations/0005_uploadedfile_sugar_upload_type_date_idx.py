@@ -0,0 +1,17 @@
+# Generated by Django 6.0.2 on 2026-10-15 10:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sugar', '0004_alter_uploadedfile_price_type'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='uploadedfile',
+            index=models.Index(fields=['price_type', '-upload_date'], name='sugar_upload_type_date_idx'),
+        ),
+    ]
@@ -1,9 +1,7 @@
 import os
-import io
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from datetime import datetime
-import pandas as pd
 from .storage import DatasetStorage # Import the custom storage
 
 class UploadedFile(models.Model):
@@ -21,6 +19,15 @@ class UploadedFile(models.Model):
     start_date = models.DateField(null=True, blank=True)
     end_date = models.DateField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            # Backs the dashboard listing: filter by price_type, newest first
+            models.Index(
+                fields=["price_type", "-upload_date"],
+                name="sugar_upload_type_date_idx",
+            ),
+        ]
+
     def save(self, *args, **kwargs):
         # This logic only applies when a file is being added for the first time.
         if self._state.adding and self.file:
@@ -30,18 +37,25 @@ class UploadedFile(models.Model):
                 raise ValueError("Price type must be set.")
 
             try:
-                # Process the file in memory.
+                # pandas is only needed when a dataset is uploaded, so keep
+                # it out of the import path of every other request
+                import pandas as pd
+
+                # Only the header row is needed to find the date range
+                self.file.seek(0)
+                df = pd.read_excel(self.file, nrows=0)
                 self.file.seek(0)
-                df = pd.read_excel(io.BytesIO(self.file.read()))
 
-                dates = [pd.to_datetime(col, format="%d/ %m/ %Y", errors='coerce') for col in df.columns]
-                dates = [d for d in dates if not pd.isna(d)]
+                # Parse every column header in one vectorized call
+                dates = pd.to_datetime(
+                    df.columns, format="%d/ %m/ %Y", errors="coerce"
+                ).dropna()
 
-                if not dates:
+                if dates.empty:
                     raise ValueError("No valid dates found in file columns.")
 
-                self.start_date = min(dates).date()
-                self.end_date = max(dates).date()
+                self.start_date = dates.min().date()
+                self.end_date = dates.max().date()
 
                 _, file_extension = os.path.splitext(self.file.name)
                 
@@ -49,9 +63,12 @@ class UploadedFile(models.Model):
                 new_filename_base = f"{price_type.capitalize()}_{self.start_date.strftime('%Y-%m-%d')}_{self.end_date.strftime('%Y-%m-%d')}{file_extension}"
                 new_filename_with_path = os.path.join(price_type, new_filename_base)
 
-                existing_files = UploadedFile.objects.filter(file=new_filename_with_path)
-                for f in existing_files:
-                    f.delete() # This will also delete the file from storage.
+                # Rows are removed with one DELETE; they all share this file.
+                deleted, _ = UploadedFile.objects.filter(
+                    file=new_filename_with_path
+                ).delete()
+                if deleted:
+                    self.file.storage.delete(new_filename_with_path)
 
                 # Set the final name, which the storage backend will use.
                 self.file.name = new_filename_with_path
@@ -73,10 +90,18 @@ class UploadedFile(models.Model):
         return os.path.basename(self.file.name)
 
     def delete(self, *args, **kwargs):
-        # Delete the file from storage first, then the model instance
-        if self.file and self.file.name: # Ensure file attribute is set and has a name
-            try:
-                self.file.storage.delete(self.file.name)
-            except Exception as e:
-                print(f"Error deleting file from storage: {self.file.name} - {e}")
+        # Delete the model instance first and remove the file from storage
+        # only once that is committed, so a rolled-back delete never leaves
+        # a row pointing at a missing file
+        file_name = self.file.name if self.file else None
+        storage = self.file.storage
         super().delete(*args, **kwargs)
+        if file_name:
+            transaction.on_commit(lambda: _delete_from_storage(storage, file_name))
+
+
+def _delete_from_storage(storage, name):
+    try:
+        storage.delete(name)
+    except Exception as e:
+        print(f"Error deleting file from storage: {name} - {e}")
@@ -123,6 +123,15 @@ STATIC_URL = "static/"
 STATIC_ROOT = BASE_DIR / "staticfiles"
 STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 
+# Keep typical dataset uploads in memory instead of spooling them to a
+# temporary file before they are written to DatasetStorage
+FILE_UPLOAD_MAX_MEMORY_SIZE = 16 * 1024 * 1024  # 16 MB
+
+# When the app runs behind nginx, set this to an internal location that
+# aliases the dataset directory (e.g. "/protected_datasets/") so downloads
+# are sent by nginx via X-Accel-Redirect instead of through Python
+DATASET_ACCEL_REDIRECT_PREFIX = None
+
 # Django Q Configuration
 Q_CLUSTER = {
     "name": "sugar",
@@ -132,4 +141,5 @@ Q_CLUSTER = {
     "queue_limit": 50,
     "bulk": 10,
     "orm": "default",  # Use Django's ORM to manage the queue
+    "daemonize_workers": False,  # Allow tasks to use a process pool
 }
@@ -11,6 +11,32 @@ document.addEventListener('DOMContentLoaded', function () {
     const predictionResultsUrl = resultsContainer.dataset.resultsUrl;
     const predictionTableUrl = resultsContainer.dataset.tableUrl;
 
+    // Builds the forecast table from the {columns, data} payload of the table endpoint
+    function renderForecastTable(forecastRows) {
+        const table = document.createElement('table');
+        table.className = 'min-w-full divide-y divide-gray-200';
+
+        const headerRow = table.createTHead().insertRow();
+        forecastRows.columns.forEach(column => {
+            const th = document.createElement('th');
+            th.className = 'px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider';
+            th.textContent = column;
+            headerRow.appendChild(th);
+        });
+
+        const tbody = table.createTBody();
+        forecastRows.data.forEach(row => {
+            const tr = tbody.insertRow();
+            row.forEach(value => {
+                const td = tr.insertCell();
+                td.className = 'px-6 py-4 whitespace-nowrap text-left';
+                td.textContent = value;
+            });
+        });
+
+        return table;
+    }
+
     function fetchAndRenderResults() {
         resultsContainer.innerHTML = `
             <div class="flex flex-col items-center justify-center p-6 bg-white rounded-2xl shadow-md h-96">
@@ -315,7 +341,7 @@ document.addEventListener('DOMContentLoaded', function () {
                 return response.json();
             })
             .then(data => {
-                tableContentArea.innerHTML = data.forecast_table;
+                tableContentArea.replaceChildren(renderForecastTable(data.forecast_rows));
             })
             .catch(error => {
                 tableContentArea.innerHTML = `<p class="text-center text-red-500 p-4">Error: ${error.message}</p>`;
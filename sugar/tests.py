@@ -0,0 +1,56 @@
+import shutil
+import tempfile
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from .models import UploadedFile
+
+
+class DashboardCachingTests(TestCase):
+    def setUp(self):
+        base_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, base_dir, ignore_errors=True)
+        settings_override = override_settings(BASE_DIR=base_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        User.objects.create_user("admin", password="secret")
+        self.client.login(username="admin", password="secret")
+        # The first render sets the CSRF cookie, which is part of the ETag
+        self.client.get("/dashboard/")
+
+    def add_upload(self, name):
+        # bulk_create skips UploadedFile.save, which parses the Excel file
+        UploadedFile.objects.bulk_create(
+            [UploadedFile(file=f"local/{name}", price_type="local")]
+        )
+
+    def test_unchanged_dashboard_answers_304(self):
+        response = self.client.get("/dashboard/")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("private", response["Cache-Control"])
+        self.assertIn("no-cache", response["Cache-Control"])
+
+        response = self.client.get("/dashboard/", HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+    def test_upload_and_delete_change_the_etag(self):
+        self.add_upload("Local_2024-01-01_2024-12-31.xlsx")
+        etag = self.client.get("/dashboard/")["ETag"]
+
+        self.add_upload("Local_2025-01-01_2025-12-31.xlsx")
+        response = self.client.get("/dashboard/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        etag = response["ETag"]
+        UploadedFile.objects.filter(file__endswith="2024-12-31.xlsx").delete()
+        response = self.client.get("/dashboard/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_anonymous_requests_get_no_etag(self):
+        self.client.logout()
+
+        response = self.client.get("/dashboard/")
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(response.has_header("ETag"))
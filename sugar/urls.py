@@ -16,6 +16,7 @@ urlpatterns = [
     path("train/", rfr_views.start_training_view, name="start_training"),
     path("results/", rfr_views.prediction_results_view, name="prediction_results"),
     path("prediction_table/", rfr_views.prediction_table_view, name="prediction_table"),
+    path("evaluation_plot/", rfr_views.evaluation_plot_view, name="evaluation_plot"),
 ]
 
 if settings.DEBUG:
@@ -2,12 +2,122 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.conf import settings
 from django.core.paginator import Paginator
 from django.contrib.auth import authenticate, login, logout
-from django.http import HttpResponse, Http404
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils.http import content_disposition_header
+from django.views.decorators.http import condition, require_POST
+from django.views.decorators.cache import cache_control
+from django.db import transaction
+from django.db.models import Count, Max
 from datetime import datetime
+from urllib.parse import quote
+from functools import lru_cache
 import os
-import joblib
+import json
+import hashlib
 from .models import UploadedFile
-from rfr_model.pipeline import get_model_paths
+from rfr_model.paths import get_model_paths
+
+
+@lru_cache(maxsize=4)
+def _read_training_timestamp(path, mtime_ns):
+    """
+    Parses the last training timestamp file. The file's mtime is part of
+    the cache key, so a retrain is picked up on the next request.
+    """
+    with open(path, "r") as f:
+        try:
+            return datetime.fromisoformat(f.readline().rstrip())
+        except ValueError:
+            return None
+
+
+def _get_last_trained_timestamp(paths):
+    path = paths["last_training_timestamp_path"]
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    return _read_training_timestamp(path, mtime_ns)
+
+
+@lru_cache(maxsize=4)
+def _read_home_snapshot(timestamp_path, summary_path, mtimes):
+    """
+    Builds the model values shown on the home page from the training
+    timestamp and the JSON summary written at training time. mtimes
+    (None for a missing file) is only part of the cache key, so the
+    snapshot is rebuilt once per retrain. Callers must not mutate it.
+    """
+    snapshot = {
+        "last_trained_timestamp": None,
+        "training_date_range": None,
+        "rmse": None,
+        "mape": None,
+    }
+    timestamp_mtime_ns, summary_mtime_ns = mtimes
+    if timestamp_mtime_ns is not None:
+        snapshot["last_trained_timestamp"] = _read_training_timestamp(
+            timestamp_path, timestamp_mtime_ns
+        )
+    if summary_mtime_ns is not None:
+        with open(summary_path, "r") as f:
+            home_summary = json.load(f)
+        snapshot["training_date_range"] = (
+            f"{home_summary['first_date']} to {home_summary['last_date']}"
+        )
+        snapshot["rmse"] = home_summary.get("RMSE")
+        snapshot["mape"] = home_summary.get("MAPE")
+    return snapshot
+
+
+def _ensure_home_summary(paths):
+    """
+    Models trained before home_summary.json existed still have the
+    evaluation metrics and df_transformed. Writes the summary from them
+    once, so the home page keeps showing the date range and metrics.
+    """
+    try:
+        import joblib
+        from rfr_model.q_tasks import save_home_summary
+
+        df_transformed = joblib.load(paths["df_transformed_path"])
+        evaluation = joblib.load(paths["evaluation_metrics_path"])
+        save_home_summary(paths, df_transformed, evaluation)
+    except Exception as e:
+        print(f"Could not build home summary from older artifacts: {e}")
+
+
+def _get_home_snapshot(paths):
+    mtimes = []
+    for key in ("last_training_timestamp_path", "home_summary_path"):
+        try:
+            mtimes.append(os.stat(paths[key]).st_mtime_ns)
+        except FileNotFoundError:
+            if key == "home_summary_path" and os.path.exists(
+                paths["evaluation_metrics_path"]
+            ):
+                _ensure_home_summary(paths)
+                try:
+                    mtimes.append(os.stat(paths[key]).st_mtime_ns)
+                    continue
+                except FileNotFoundError:
+                    pass
+            mtimes.append(None)
+    try:
+        return _read_home_snapshot(
+            paths["last_training_timestamp_path"],
+            paths["home_summary_path"],
+            tuple(mtimes),
+        )
+    except Exception:
+        # Failures are not cached, so an unreadable summary is retried on
+        # the next request instead of hiding the values until a retrain
+        return {
+            "last_trained_timestamp": _get_last_trained_timestamp(paths),
+            "training_date_range": None,
+            "rmse": None,
+            "mape": None,
+        }
 
 
 def home(request):
@@ -17,47 +127,8 @@ def home(request):
     
     paths = get_model_paths(price_type)
 
-    # Get last trained timestamp
-    last_trained_timestamp = None
-    if os.path.exists(paths["last_training_timestamp_path"]):
-        with open(paths["last_training_timestamp_path"], "r") as f:
-            try:
-                last_trained_timestamp = datetime.fromisoformat(f.read().strip())
-            except ValueError:
-                pass
-
-    # Get model training date range
-    training_date_range = None
-    if os.path.exists(paths["df_transformed_path"]):
-        try:
-            df_transformed = joblib.load(paths["df_transformed_path"])
-            if not df_transformed.empty and "Date" in df_transformed.columns:
-                min_date = df_transformed["Date"].min().strftime("%d-%m-%Y")
-                max_date = df_transformed["Date"].max().strftime("%d-%m-%Y")
-                training_date_range = f"{min_date} to {max_date}"
-        except Exception:
-            pass
-    
-    # Get RMSE and MAPE values
-    rmse = None
-    mape = None
-    if os.path.exists(paths["evaluation_metrics_path"]):
-        try:
-            evaluation_metrics = joblib.load(paths["evaluation_metrics_path"])
-            # Access the nested 'overall' dictionary
-            overall_metrics = evaluation_metrics.get("overall", {})
-            rmse = overall_metrics.get("RMSE")
-            mape = overall_metrics.get("MAPE")
-        except Exception:
-            pass
-
-    context = {
-        "last_trained_timestamp": last_trained_timestamp,
-        "training_date_range": training_date_range,
-        "rmse": rmse,
-        "mape": mape,
-        "price_type": price_type,
-    }
+    # Last trained timestamp, training date range, RMSE and MAPE
+    context = {**_get_home_snapshot(paths), "price_type": price_type}
     return render(request, "home.html", context)
 
 
@@ -80,6 +151,47 @@ def logout_view(request):
     return redirect("login")
 
 
+def _dashboard_etag(request):
+    """
+    ETag for dashboard GETs. It changes whenever the listed uploads, the
+    training timestamp, the user or their CSRF secret (the page embeds a
+    token) change. Returns None for requests that should not be cached.
+    """
+    if request.method != "GET" or not request.user.is_authenticated:
+        return None
+
+    price_type = request.GET.get("price_type") or "local"
+    if price_type not in ["local", "premium"]:
+        price_type = "local"
+
+    # Uploads only ever add newer rows, so the latest date and the row
+    # count together change on every upload, replacement and delete
+    uploads = UploadedFile.objects.filter(price_type=price_type).aggregate(
+        latest=Max("upload_date"), total=Count("id")
+    )
+    try:
+        timestamp_mtime_ns = os.stat(
+            get_model_paths(price_type)["last_training_timestamp_path"]
+        ).st_mtime_ns
+    except FileNotFoundError:
+        timestamp_mtime_ns = None
+
+    key = ":".join(
+        str(part)
+        for part in (
+            request.user.pk,
+            price_type,
+            uploads["latest"],
+            uploads["total"],
+            timestamp_mtime_ns,
+            request.COOKIES.get(settings.CSRF_COOKIE_NAME),
+        )
+    )
+    return hashlib.md5(key.encode()).hexdigest()
+
+
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_dashboard_etag)
 def dashboard_view(request):
     if not request.user.is_authenticated:
         return redirect("login")
@@ -108,22 +220,26 @@ def dashboard_view(request):
         price_type = "local"
 
     paths = get_model_paths(price_type)
-    uploaded_files_list = UploadedFile.objects.filter(price_type=price_type).order_by("-upload_date")
+    # Plain rows with only the columns the table shows, so no model
+    # instances or FieldFile descriptors are built per row
+    uploaded_files_list = (
+        UploadedFile.objects.filter(price_type=price_type)
+        .order_by("-upload_date")
+        .values("id", "file", "start_date", "end_date", "upload_date")
+    )
 
     paginator = Paginator(uploaded_files_list, 5)
     page_number = request.GET.get("page")
     page_obj = paginator.get_page(page_number)
+    dataset_rows = [
+        {**row, "name": os.path.basename(row["file"])} for row in page_obj
+    ]
 
-    last_trained_timestamp = None
-    if os.path.exists(paths["last_training_timestamp_path"]):
-        with open(paths["last_training_timestamp_path"], "r") as f:
-            try:
-                last_trained_timestamp = datetime.fromisoformat(f.read().strip())
-            except ValueError:
-                pass
+    last_trained_timestamp = _get_last_trained_timestamp(paths)
 
     context = {
         "uploaded_files": page_obj,
+        "dataset_rows": dataset_rows,
         "last_trained_timestamp": last_trained_timestamp,
         "price_type": price_type,
     }
@@ -133,27 +249,39 @@ def dashboard_view(request):
 
 def download_file(request, file_id):
     uploaded_file = get_object_or_404(UploadedFile, pk=file_id)
-    file_path = uploaded_file.file.path
+    storage = uploaded_file.file.storage
+
+    if not storage.exists(uploaded_file.file.name):
+        raise Http404
+
+    content_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    accel_prefix = settings.DATASET_ACCEL_REDIRECT_PREFIX
+    if accel_prefix:
+        # Let nginx send the file itself; Python only returns the headers
+        response = HttpResponse(content_type=content_type)
+        response["Content-Disposition"] = content_disposition_header(
+            False, uploaded_file.name
+        )
+        response["X-Accel-Redirect"] = accel_prefix + quote(uploaded_file.file.name)
+        return response
 
-    if os.path.exists(file_path):
-        with open(file_path, "rb") as fh:
-            response = HttpResponse(
-                fh.read(),
-                content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            )
-            response["Content-Disposition"] = "inline; filename=" + os.path.basename(
-                file_path
-            )
-            return response
-    raise Http404
+    # FileResponse streams the file in chunks (or via sendfile when the
+    # server supports it) instead of reading it into memory
+    return FileResponse(
+        storage.open(uploaded_file.file.name, "rb"),
+        filename=uploaded_file.name,
+        content_type=content_type,
+    )
 
 
+@require_POST
 def delete_file(request, file_id):
     price_type = request.POST.get("price_type", "local")
     try:
-        uploaded_file = get_object_or_404(UploadedFile, pk=file_id)
-        file_name = uploaded_file.name
-        uploaded_file.delete()
+        with transaction.atomic():
+            uploaded_file = get_object_or_404(UploadedFile, pk=file_id)
+            file_name = uploaded_file.name
+            uploaded_file.delete()
         message = f"Dataset '{file_name}' deleted successfully."
         status = "success"
     except Exception as e: